@@ -6,6 +6,7 @@ from time import sleep
 import pandas as pd
 from random import uniform
 from pickle import dump
+from instrumentation import count, progress, stage, write_report
 
 
 def scroll():
@@ -80,31 +81,33 @@ def get_judgement(url, judgment_dict: dict, n: int):
             url = url,
             case_details = raw_text
         )
+        count('judgments_scraped')
     else:
-        next
+        count('pages_without_content')
 
 # initialize driver from downloads folder
 driver = webdriver.Edge("C:/Users/julia/Downloads/msedgedriver.exe")
 driver.implicitly_wait(5) # set implicit wait to 5 sec
-driver.get("https://hudoc.echr.coe.int/eng#{%22documentcollectionid2%22:[%22GRANDCHAMBER%22]}")
-scroll() # scroll index page down to load all further links
+with stage('scrape_index'):
+    driver.get("https://hudoc.echr.coe.int/eng#{%22documentcollectionid2%22:[%22GRANDCHAMBER%22]}")
+    scroll() # scroll index page down to load all further links
 
-soup = BeautifulSoup(driver.page_source) # save index once scroll is finished
+    soup = BeautifulSoup(driver.page_source) # save index once scroll is finished
 
-# save all urls
-urls = list(set(["https://hudoc.echr.coe.int/eng#{" + elem['href'].partition('"GRANDCHAMBER"],')[2] for elem in soup.find_all(class_ = 'availableonlylink', href = True) if elem.text == 'English']))
+    # save all urls
+    urls = list(set(["https://hudoc.echr.coe.int/eng#{" + elem['href'].partition('"GRANDCHAMBER"],')[2] for elem in soup.find_all(class_ = 'availableonlylink', href = True) if elem.text == 'English']))
+    count('urls', len(urls))
 
 # scrape all the data and store it in the attributes of the class instances, with each judgement as one instance
-n = 1 
 judgment_dict = {}
-for url in urls:
-    get_judgement(url, judgment_dict, n)
-    sleep(uniform(0.5,1))
-    print(f"judgement: #{n}")
-    print(f"dict-length: #{len(judgment_dict)}")
-    driver.back()
-    n += 1
+with stage('scrape_judgments'):
+    for n, url in enumerate(progress(urls, 'Scraped judgments'), 1):
+        get_judgement(url, judgment_dict, n)
+        sleep(uniform(0.5,1))
+        driver.back()
 
 # save data
 with open('all_data_finally.pickle', 'wb') as handle:
-    dump(judgment_dict, handle)
\ No newline at end of file
+    dump(judgment_dict, handle)
+
+write_report('module_1')
\ No newline at end of file
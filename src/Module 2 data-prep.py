@@ -9,6 +9,7 @@ from sklearn.metrics import confusion_matrix
 from spacy.tokens import DocBin
 from spacy.matcher import Matcher
 from spacy.util import filter_spans
+from instrumentation import count, progress, stage, write_report
 
 class Judgment:
     """Contains all essential information of the respective Judgment.
@@ -89,10 +90,12 @@ def clean_data(df):
     df['the_law'] = df['text'].str.extract(r"(?:THE\sLAW)(?P<the_law>.*)(?:FOR\sTHESE\sREASONS)", flags=re.S)
     df['articles'] = [list(filter(None, re.sub('\d{1,2}-\d{1,2}-?.?', '', re.sub('(?<=P\d)-', '#', j)).replace('Rules of Court', '').split('\n'))) for j in df['articles']]
     df['related_cases'] = [re.findall(r"\d{3,5}\/\d{2}", row, flags=re.S) for row in df['related_cases']]
+    df['app_numbers'] = [re.findall(r"\d{3,5}\/\d{2}", row) for row in df['ident']] # joined cases have several application numbers
     pattern = "(?:[^Nn][^o])(?P<article_violation>\s[vV]iolation\sof\s(?:[Aa]rticle|[Aa]rt[.])\sP?\d{1,2})"
-    df['violations'] = [re.findall(pattern=pattern, string=i, flags=re.S) if re.findall(pattern=pattern, string=i, flags=re.S) else None for i in df['conclusion']]
+    df['violations'] = [re.findall(pattern=pattern, string=i, flags=re.S) or None for i in df['conclusion']]
     pattern = "(?P<no_article_violation>[nN]o\s[vV]iolation\sof\s(?:[Aa]rticle|[Aa]rt[.])\sP?\d{1,2})"
-    df['no_violations'] = [re.findall(pattern=pattern, string=i, flags=re.S) if re.findall(pattern=pattern, string=i, flags=re.S) else None for i in df['conclusion']]
+    df['no_violations'] = [re.findall(pattern=pattern, string=i, flags=re.S) or None for i in df['conclusion']]
+    count('regex_matches', sum(len(i) for column in ['related_cases', 'app_numbers', 'violations', 'no_violations'] for i in df[column] if i))
     df['intro_text'] = df['text'].str.extract(r"(?:composed\sof)(?P<intro_text>.*?)(?:following\sjudgment[,]?)", flags=re.S)
 
     labels = []
@@ -111,25 +114,42 @@ def clean_data(df):
     return df
 
 # Extracting & Cleaning of data
-df = extract_data(raw_data)
-df = clean_data(df)
+with stage('extract_data'):
+    df = extract_data(raw_data)
+with stage('clean_data'):
+    df = clean_data(df)
 
 
 ### Extraction of judge names with spaCy's rule-based Matching Engine
-nlp=spacy.load("en_core_web_sm")
-n = 1
-judges = []
+def extract_judges(df):
+    """Takes cleaned dataframe as argument and extracts the names of the judges from the intro text of each Judgement.
+    
+    Uses spaCy's rule-based Matching Engine on entities of type Person. Titles such as Mr, Mrs and Sir are removed from the names.
+    
+    Args:
+        df (df): Cleaned dataframe containing the scraped Judgement.
+        
+    Returns:
+        A list containing the list of judges for each Judgement.
+        
+    """
+    judges = []
 
-matcher = Matcher(nlp.vocab)
-pattern = [{"ENT_TYPE": "PERSON", "OP": "+"}] # Match on or multiple Entities of type Person
+    matcher = Matcher(nlp.vocab)
+    pattern = [{"ENT_TYPE": "PERSON", "OP": "+"}] # Match on or multiple Entities of type Person
 
-matcher.add("judge", [pattern])
-for doc, ident in zip(nlp.pipe(df['intro_text'], batch_size=10, n_process=3), list(df['ident'])):
-    matches = matcher(doc)
-    spans = [doc[start:end] for match_id, start, end in matches] # get spans of matches in doc
-    judges.append([re.sub("(Mr\s?|Mrs\s?|Sir\s?)", "", span.text) for span in filter_spans(spans)]) # Filter_spans removes duplicate entities (e.g. First and Last name separate)
-    print(f'Completed iteration {n} of {len(df["intro_text"])}')
-    n += 1
+    matcher.add("judge", [pattern])
+    for doc in progress(nlp.pipe(df['intro_text'], batch_size=10, n_process=3), 'Extracted judges', total=len(df)):
+        matches = matcher(doc)
+        spans = [doc[start:end] for match_id, start, end in matches] # get spans of matches in doc
+        judges.append([re.sub("(Mr\s?|Mrs\s?|Sir\s?)", "", span.text) for span in filter_spans(spans)]) # Filter_spans removes duplicate entities (e.g. First and Last name separate)
+    count('ner_calls', len(judges))
+    count('judges_matched', sum(len(j) for j in judges))
+    return judges
+
+nlp=spacy.load("en_core_web_sm")
+with stage('extract_judges'):
+    judges = extract_judges(df)
 
 # Include judges into dataframe
 df['judges'] = judges
@@ -139,6 +159,65 @@ with open('data/data_cleaned.pickle', 'wb') as handle:
     dump(df, handle)
 
 
+def build_index(df):
+    """Takes cleaned dataframe as argument and maps each application number to the row of its Judgement.
+    
+    Joined cases are registered under several application numbers, each of which maps to the same row. If an application number occurs more than once, the first Judgement is kept.
+    
+    Args:
+        df (df): Cleaned dataframe containing the scraped Judgement.
+        
+    Returns:
+        Dictionary with the application numbers as keys and the index labels of the dataframe as values.
+        
+    """
+    index = {}
+    for row, numbers in zip(df.index, df['app_numbers']):
+        for number in numbers:
+            index.setdefault(number, row)
+    return index
+
+
+def build_citation_table(df, index):
+    """Takes cleaned dataframe and application number index as arguments and creates a table of all citations between Judgements.
+    
+    Each related case is resolved via the index. Resolved citations point to the first application number of the cited Judgement, so joined cases are one node in the network, and carry the year gap and the articles shared by both Judgements. Citations of cases outside of the dataset are kept with the resolved flag set to False.
+    
+    Args:
+        df (df): Cleaned dataframe containing the scraped Judgement.
+        index (dict): Application number index created by build_index.
+        
+    Returns:
+        The citation table, with one row per citation.
+        
+    """
+    cases = dict(zip(df.index, df['app_numbers'].str[0]))
+    years = dict(zip(df.index, df['date'].dt.year))
+    articles = dict(zip(df.index, [set(a) for a in df['articles']]))
+
+    citations = []
+    for row, numbers, related in zip(df.index, df['app_numbers'], df['related_cases']):
+        if not numbers:
+            continue
+        for cited in related:
+            cited_row = index.get(cited)
+            if cited_row is None:
+                citations.append((numbers[0], cited, cited, False, None, []))
+            else:
+                citations.append((numbers[0], cited, cases[cited_row], True, years[row] - years[cited_row], sorted(articles[row] & articles[cited_row])))
+    count('citations', len(citations))
+    count('citations_resolved', sum(c[3] for c in citations))
+    return pd.DataFrame(citations, columns=['citing', 'cited', 'cited_case', 'resolved', 'year_gap', 'shared_articles'])
+
+# Build application number index and citation table once, so module 3 does not need to parse the application numbers again
+with stage('build_citation_table'):
+    index = build_index(df)
+    citations = build_citation_table(df, index)
+
+with open('data/citations.pickle', 'wb') as handle:
+    dump(citations, handle)
+
+
 ## create train-test split, stratifying the data as categories are imbalanced
 X_train, X_test, y_train, y_test = train_test_split(
     df['the_law'], df['label'], test_size=0.3, random_state=42,
@@ -160,9 +239,8 @@ def make_docs(df):
         A doc of the Judgement.
         
     """
-    n = 1
     docs = []
-    for doc, label in nlp.pipe(df, batch_size=10, n_process=3, as_tuples=True):
+    for doc, label in progress(nlp.pipe(df, batch_size=10, n_process=3, as_tuples=True), 'Processed docs', total=len(df)):
         if label == 'no_violation':
             doc.cats['no_violation'] = 1
             doc.cats['violation'] = 0
@@ -184,18 +262,19 @@ def make_docs(df):
             doc.cats['other'] = 0
             doc.cats['mixed'] = 1
         docs.append(doc)
-        print(f"Processed {n} out of {len(df)}")
-        n += 1
+    count('ner_calls', len(docs))
     return(docs)
 
 # Process both training and test datasets and save them. This will take quite some time
-train_docs = make_docs(train_data)
-doc_bin = DocBin(docs=train_docs)
-doc_bin.to_disk("./data/train.spacy")
+with stage('make_docs_train'):
+    train_docs = make_docs(train_data)
+    doc_bin = DocBin(docs=train_docs)
+    doc_bin.to_disk("./data/train.spacy")
 
-test_docs = make_docs(test_data)
-doc_bin = DocBin(docs=test_docs)
-doc_bin.to_disk("./data/test.spacy")
+with stage('make_docs_test'):
+    test_docs = make_docs(test_data)
+    doc_bin = DocBin(docs=test_docs)
+    doc_bin.to_disk("./data/test.spacy")
 
 # For training the model, go to directory, open anaconda and run python -m spacy init fill-config ./base_config.cfg ./config.cfg 
 # Then, run config file: python -m spacy train config.cfg --output ./output
@@ -204,12 +283,16 @@ doc_bin.to_disk("./data/test.spacy")
 # Load trained model
 nlp = spacy.load("output/model-best")
 
-# Make predictions on test dataset
-y_pred = [max(nlp(text).cats, key=nlp(text).cats.get) for text in X_test]
+# Make predictions on test dataset, each text is only processed once
+with stage('predict'):
+    y_pred = [max(doc.cats, key=doc.cats.get) for doc in nlp.pipe(X_test)]
+    count('classifier_calls', len(y_pred))
 
 # Create confusion matrix
 cm = confusion_matrix(y_test, y_pred)
 
 # Save CM for further viz
 with open('data/cm.pickle', 'wb') as handle:
-    dump(cm, handle)
\ No newline at end of file
+    dump(cm, handle)
+
+write_report('module_2')
\ No newline at end of file
@@ -4,14 +4,17 @@ import plotly.io as pio
 import plotly.figure_factory as ff
 from pickle import load
 import networkx as nx
-import re
 import numpy as np
 import pandas as pd
+from instrumentation import count, stage, write_report
 
-# Open cleaned data from module 2
+# Open cleaned data and citation table from module 2
 with open('data/data_cleaned.pickle', 'rb') as handle:
     df = load(handle)
 
+with open('data/citations.pickle', 'rb') as handle:
+    citations = load(handle)
+
 # Over time chart by year per country
 
 df['year'] = df['date'].dt.year # Extract year column
@@ -54,30 +57,48 @@ pio.write_json(fig1, 'output/plotly_bycountry.json')
 
 # Network graph
 
-# related cases of each judgment are in a list which needs to be unpacked. Create list of tuples with metainformation for graph
-nodes = [(re.findall('\d{3,5}\/\d{2}', row)[0], l, c, y, t.replace('(1 of 1) ', '')) for row, l, c, y, t in zip(df['ident'], df['related_cases'], df['respondent_state'], df['year'], df['title']) if re.findall('\d{3,5}\/\d{2}', row)]
-
-# Create the network via networkx
-G = nx.Graph() # initializes Graph
-for node in nodes:
-    if node[0] not in G:
-        G.add_node(node[0], country=node[2], year=node[3], title=node[4],  size = 1) # pass meta information
-        if node[1]:
-            for i in node[1]:
-                if G.has_edge(node[0], i):
-                    G[node[0]][i]['weight'] += 1
-                else:
-                    G.add_edge(node[0], i, weight=1)
+def build_network(df, citations):
+    """Takes cleaned dataframe and citation table as arguments and creates the citation network of the Judgements.
     
-G.remove_nodes_from(list(nx.isolates(G))) # remove all isolates to declutter graph
- 
- # remove all node with less than 5 edges to declutter the graph
-for node in list(G.nodes):
-    if len(G.edges(node)) < 5:
-        G.remove_node(node)
+    Each Judgement is a node carrying its country, year and title as meta information, and each case it cites is linked to it by an edge carrying the shared articles. Cited cases outside of the dataset are marked as not resolved. Isolates and nodes with less than 5 edges are removed to declutter the graph.
+    
+    Args:
+        df (df): Cleaned dataframe containing scraped jugement data.
+        citations (df): Citation table from module 2.
+        
+    Returns:
+        The networkx Graph.
+    """
+    # Create the network via networkx
+    G = nx.Graph() # initializes Graph
+    for numbers, c, y, t in zip(df['app_numbers'], df['respondent_state'], df['year'], df['title']):
+        if numbers and numbers[0] not in G:
+            G.add_node(numbers[0], country=c, year=y, title=t.replace('(1 of 1) ', ''), resolved=True, size = 1) # pass meta information
+    G.add_nodes_from((case for case in citations.loc[~citations['resolved'], 'cited_case'] if case not in G), resolved=False, size = 1)
+    nx.set_node_attributes(G, citations.groupby('cited_case')['citing'].nunique().to_dict(), 'cited_by')
+
+    for citing, cited, articles in zip(citations['citing'], citations['cited_case'], citations['shared_articles']):
+        if G.has_edge(citing, cited):
+            G[citing][cited]['weight'] += 1
+            G[citing][cited]['shared_articles'].update(articles)
+        else:
+            G.add_edge(citing, cited, weight=1, shared_articles=set(articles))
+    count('edges_built', G.number_of_edges())
+
+    G.remove_nodes_from(list(nx.isolates(G))) # remove all isolates to declutter graph
+
+    # remove all node with less than 5 edges to declutter the graph
+    for node in list(G.nodes):
+        if len(G.edges(node)) < 5:
+            G.remove_node(node)
+    return G
+
+with stage('build_network'):
+    G = build_network(df, citations)
 
 # create x and y coordinates with spring algorithm
-pos_ = nx.spring_layout(G)
+with stage('spring_layout'):
+    pos_ = nx.spring_layout(G)
 
 
 def make_edge(x, y, text, width):
@@ -102,25 +123,33 @@ def make_edge(x, y, text, width):
                        mode = 'lines')
 
 # Create edges by passing Edge info from G and positions from pos_
-edge_trace = []
-for edge in G.edges():
-    if G.edges()[edge]['weight'] > 0:
-        node_1 = edge[0]
-        node_2 = edge[1]
-        x0, y0 = pos_[node_1]
-        x1, y1 = pos_[node_2]
-        text = node_1 + '--' + node_2 + ': ' + str(G.edges()[edge]['weight'])
-        trace = make_edge([x0, x1, None], [y0, y1, None], text, width = 0.3*G.edges()[edge]['weight']**1.75)
-        edge_trace.append(trace)
+with stage('make_edges'):
+    edge_trace = []
+    for edge in G.edges():
+        if G.edges()[edge]['weight'] > 0:
+            node_1 = edge[0]
+            node_2 = edge[1]
+            x0, y0 = pos_[node_1]
+            x1, y1 = pos_[node_2]
+            text = node_1 + '--' + node_2 + ': ' + str(G.edges()[edge]['weight'])
+            if G.edges()[edge]['shared_articles']:
+                text += '<br>Shared articles: ' + ', '.join(sorted(G.edges()[edge]['shared_articles']))
+            trace = make_edge([x0, x1, None], [y0, y1, None], text, width = 0.3*G.edges()[edge]['weight']**1.75)
+            edge_trace.append(trace)
 
 # Create tooltip from Node metadata
-# Since only data from the Grand chamber is in the data, all referenced cases from the lower chamber will not display any
+# Since only data from the Grand chamber is in the data, referenced cases from the lower chamber only display their application number
 tooltip = []
 for node in G.nodes:
     tooltip.append("<br>".join([
         f"{G.nodes[node]['title']}",
-        f"{G.nodes[node]['year']}"
-    ]) if G.nodes[node] else 'not in Grand Chamber')  
+        f"{G.nodes[node]['year']}",
+        f"Cited by {G.nodes[node].get('cited_by', 0)} judgments"
+    ]) if G.nodes[node]['resolved'] else "<br>".join([
+        f"{node}",
+        "not in Grand Chamber",
+        f"Cited by {G.nodes[node].get('cited_by', 0)} judgments"
+    ]))
 
 # Create empty scatter, pass tooltips
 node_trace = go.Scatter(x = [],
@@ -155,12 +184,10 @@ for node in G.nodes:
 # Create figure
 fig = go.Figure(layout = layout)
 
-# Add all edge traces. This will take a couple of minutes
-n = 1
-for trace in edge_trace:
-    fig.add_trace(trace)
-    print(f"Added edge {n} of {len(edge_trace)}")
-    n += 1
+# Add all edge traces at once, adding them one by one takes a couple of minutes
+with stage('add_edge_traces'):
+    fig.add_traces(edge_trace)
+    count('edge_traces', len(edge_trace))
 
 # Add node traces
 fig.add_trace(node_trace)
@@ -228,8 +255,11 @@ def create_sunburst_plot(df, column_name, title, drop_articles=False):
     return fig
 
 # Create sunbursts and save plots
-fig = create_sunburst_plot(df, 'articles', 'Number of Allegations by Country and Article', drop_articles=True)
-pio.write_json(fig, 'output/plotly_sb_art.json')
+with stage('create_sunburst_plot'):
+    fig = create_sunburst_plot(df, 'articles', 'Number of Allegations by Country and Article', drop_articles=True)
+    pio.write_json(fig, 'output/plotly_sb_art.json')
+
+    fig = create_sunburst_plot(df, 'judges', 'Number of Allegations by Country and Judge')
+    pio.write_json(fig, 'output/plotly_sb_judge.json')
 
-fig = create_sunburst_plot(df, 'judges', 'Number of Allegations by Country and Judge')
-pio.write_json(fig, 'output/plotly_sb_judge.json')
\ No newline at end of file
+write_report('module_3')
\ No newline at end of file
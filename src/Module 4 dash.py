@@ -1,4 +1,7 @@
 import re
+import os
+import atexit
+from functools import lru_cache
 import dash
 import dash_core_components as dcc
 import dash_html_components as html
@@ -11,16 +14,25 @@ import json
 import plotly.io as pio
 import plotly.graph_objects as go
 import spacy
+from instrumentation import count, stage, write_report
 
-# load spacy model for classifier
-nlp = spacy.load("output/model-best")
+debug = True
 
-# load all plots from module 3
-network_plot = pio.read_json('output/plotly_network.json')
-line_plot = pio.read_json('output/plotly_bycountry.json')
-cm_plot = pio.read_json('output/plotly_cm.json')
-judges_plot = pio.read_json('output/plotly_sb_judge.json')
-articles_plot = pio.read_json('output/plotly_sb_art.json')
+# write run report (timings, classifier calls and cache hits) once the server stops
+# in debug mode the reloader runs this script in a watcher and a serving process, only the serving one handles callbacks
+if os.environ.get('WERKZEUG_RUN_MAIN') == 'true' or not debug:
+    atexit.register(write_report, 'module_4')
+
+with stage('load_model_and_plots'):
+    # load spacy model for classifier
+    nlp = spacy.load("output/model-best")
+
+    # load all plots from module 3
+    network_plot = pio.read_json('output/plotly_network.json')
+    line_plot = pio.read_json('output/plotly_bycountry.json')
+    cm_plot = pio.read_json('output/plotly_cm.json')
+    judges_plot = pio.read_json('output/plotly_sb_judge.json')
+    articles_plot = pio.read_json('output/plotly_sb_art.json')
 
 # assign logo hrefs
 echr_logo = 'https://www.mediadefence.org/wp-content/uploads/2020/06/Logo_European_Court_of_Human_Rights_1_linedrawing.jpg'
@@ -158,10 +170,21 @@ def render_content(tab):
                style={'width': '700px', 'height': '700px', 'margin': 'auto', 'display': 'inline-block'} 
             )
         ])
+@lru_cache(maxsize=128)
+def classify(text):
+    """
+    Runs the text classifier once per text, repeated inputs are served from the cache.
+    """
+    count('classifier_calls')
+    return nlp(text).cats
+
 # Create callback for Text classifier
 @app.callback(Output('model-output', 'children'), Input('text-input', 'value'))
 def update_output(value):
-    return f"Probability of no violation: {round(nlp(value).cats['no_violation'], 2)} | Probability of violation: {round(nlp(value).cats['violation'], 2)} | Probability of Other: {round(nlp(value).cats['other'], 2)} | Probability of Mixed: {round(nlp(value).cats['mixed'], 2)}"
+    hits = classify.cache_info().hits
+    cats = classify(value)
+    count('cache_hits', classify.cache_info().hits - hits)
+    return f"Probability of no violation: {round(cats['no_violation'], 2)} | Probability of violation: {round(cats['violation'], 2)} | Probability of Other: {round(cats['other'], 2)} | Probability of Mixed: {round(cats['mixed'], 2)}"
 
 if __name__ == '__main__':
-    app.run_server(debug=True)
\ No newline at end of file
+    app.run_server(debug=debug)
\ No newline at end of file
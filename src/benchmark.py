@@ -0,0 +1,303 @@
+import argparse
+import ast
+import json
+import os
+import platform
+import subprocess
+from datetime import datetime
+from random import Random
+from instrumentation import REPORT, stage
+
+# Benchmark suite for the pipeline stages of Modules 2 to 4, run on a synthetic corpus so it does not depend on the HUDOC scrape.
+# Run from the repository root, e.g.: python src/benchmark.py --sizes 100 1000 10000
+
+MODULE_2 = 'src/Module 2 data-prep.py'
+MODULE_3 = 'src/Module 3 Plots.py'
+MODULE_4 = 'src/Module 4 dash.py'
+HISTORY = 'data/benchmark_history.jsonl'
+
+STAGES = ['extract_data', 'clean_data', 'extract_judges', 'make_docs', 'build_citation_table', 'build_network', 'spring_layout', 'create_sunburst_plot', 'update_output']
+
+# Building blocks for the synthetic Judgements
+STATES = ['Turkey', 'Italy', 'Russia', 'United Kingdom', 'France', 'Germany', 'Poland', 'Greece', 'Romania', 'Ukraine', 'Belgium', 'Austria', 'Croatia', 'Latvia', 'Switzerland']
+FIRST_NAMES = ['Luzius', 'Christos', 'Jean-Paul', 'Nicolas', 'Françoise', 'Nina', 'András', 'Elisabet', 'Josep', 'Boštjan', 'Mark', 'Ganna', 'Paul', 'Dean', 'Helen', 'Krzysztof', 'Ineta', 'Dmitry', 'Angelika', 'Linos-Alexandre']
+LAST_NAMES = ['Wildhaber', 'Rozakis', 'Costa', 'Bratza', 'Tulkens', 'Vajić', 'Sajó', 'Fura', 'Casadevall', 'Zupančič', 'Villiger', 'Yudkivska', 'Mahoney', 'Spielmann', 'Keller', 'Wojtyczek', 'Ziemele', 'Dedov', 'Nußberger', 'Sicilianos']
+TITLES = ['Mr', 'Mrs', 'Sir']
+ARTICLES = ['2', '3', '5', '6', '8', '10', '11', '13', '14', '34', '35', '41', 'P1-1', 'P1-3', 'P4-2', 'P7-4']
+ARTICLE_NAMES = {'2': 'Right to life', '3': 'Prohibition of torture', '5': 'Right to liberty and security', '6': 'Right to a fair trial', '8': 'Right to respect for private and family life', '10': 'Freedom of expression', '11': 'Freedom of assembly and association', '13': 'Right to an effective remedy', '14': 'Prohibition of discrimination', 'P1-1': 'Protection of property', 'P1-3': 'Right to free elections', 'P4-2': 'Freedom of movement', 'P7-4': 'Right not to be tried or punished twice'}
+WORDS = ['applicant', 'Government', 'Court', 'Convention', 'domestic', 'authorities', 'complaint', 'proceedings', 'respondent', 'State', 'interference', 'necessary', 'democratic', 'society', 'margin', 'appreciation', 'violation', 'article', 'judgment', 'remedy', 'legitimate', 'aim', 'proportionate', 'the', 'of', 'and', 'that', 'in', 'to', 'was']
+
+
+def load_definitions(path, **namespace):
+    """Loads the imports, classes and functions of a module without running its script code.
+
+    The modules of this repository run their whole pipeline on import, so only the definitions are executed. The @app decorators are removed, so Dash callbacks can be called directly.
+
+    Args:
+        path (str): Path to the module.
+        namespace (dict): Globals the functions rely on (e.g. nlp).
+
+    Returns:
+        Dictionary containing the definitions of the module.
+    """
+    with open(path, encoding='utf-8') as handle:
+        tree = ast.parse(handle.read(), filename=path)
+    body = []
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.ClassDef)):
+            node.decorator_list = [d for d in node.decorator_list if not (isinstance(d, ast.Call) and isinstance(d.func, ast.Attribute) and isinstance(d.func.value, ast.Name) and d.func.value.id == 'app')]
+            body.append(node)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            body.append(node)
+    namespace['__name__'] = os.path.splitext(os.path.basename(path))[0]
+    exec(compile(ast.Module(body=body, type_ignores=[]), path, 'exec'), namespace)
+    return namespace
+
+
+def make_application_number(rng):
+    """Creates a random application number in the HUDOC format, e.g. 12345/06."""
+    return f"{rng.randint(100, 99999)}/{rng.randint(0, 99):02d}"
+
+
+def make_paragraphs(rng, start, count):
+    """Creates numbered paragraphs of filler text."""
+    return "\n".join(f"{n}.  " + " ".join(rng.choice(WORDS) for _ in range(rng.randint(40, 120))) + "." for n in range(start, start + count))
+
+
+def make_judgment(Judgment, rng, ident, idents, n, paragraphs, unresolved_share):
+    """Creates a single synthetic Judgment.
+
+    The case details follow the layout of the HUDOC notice, the text contains the intro panel of judges, the law and the operative provisions, and the related cases cite application numbers of the corpus as well as cases outside of it.
+
+    Args:
+        Judgment (class): Judgment class of Module 2.
+        rng (Random): Random number generator.
+        ident (str): Application number(s) of the Judgment.
+        idents (list): Application numbers of all Judgements in the corpus.
+        n (int): Position of the Judgment in the corpus.
+        paragraphs (int): Number of paragraphs in the law part of the text.
+        unresolved_share (float): Share of related cases which are not part of the corpus.
+
+    Returns:
+        The Judgment.
+    """
+    state = rng.choice(STATES)
+    applicant = rng.choice(LAST_NAMES).upper()
+    title = f"(1 of 1) CASE OF {applicant} v. {state.upper()}"
+    year = rng.randint(1990, 2021)
+    date = f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{year}"
+
+    # Judges: Grand Chamber panel with president and registrar
+    panel = [f"{rng.choice(TITLES)} {rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}" for _ in range(rng.randint(7, 17))]
+    intro = ",\n".join([panel[0] + ", President"] + panel[1:]) + f",\nand {rng.choice(TITLES)} {rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}, Registrar,"
+
+    # Articles and conclusions, leading to a mix of labels
+    articles = rng.sample(ARTICLES, rng.randint(1, 4)) + ['41']
+    conclusions = ["Preliminary objection dismissed (Article 35-3 - Ratione materiae)"]
+    for article in articles:
+        if article in ARTICLE_NAMES and rng.random() < 0.6:
+            outcome = rng.choice(['Violation', 'No violation'])
+            conclusions.append(f"{outcome} of Article {article} - {ARTICLE_NAMES[article]} (Article {article}-1)")
+    article_lines = [line for article in articles for line in (article, f"{article}-1")]
+
+    # Related cases: preferential attachment towards the earlier (leading) cases of the corpus
+    related = []
+    for _ in range(rng.randint(3, 15)):
+        if n and rng.random() > unresolved_share:
+            related.append(idents[int(rng.random() ** 2 * n)])
+        else:
+            related.append(make_application_number(rng))
+    case_law = "\n".join(f"{rng.choice(LAST_NAMES)} v. {rng.choice(STATES)}, no. {number}, § {rng.randint(1, 200)}, ECHR {rng.randint(1980, year)}" for number in related)
+
+    case_details = "\n".join([
+        "Originating Body", "Court (Grand Chamber)",
+        "Document Type", "Judgment (Merits and Just Satisfaction)",
+        "Language(s)", "English",
+        "Title", title.replace('(1 of 1) ', ''),
+        "App. No(s).", ident,
+        "Importance Level", rng.choice(['1', '2', '3', 'Key cases']),
+        "Represented by", f"{rng.choice(LAST_NAMES).upper()} {rng.choice(FIRST_NAMES)}",
+        "Respondent State(s)", state,
+        "Reference Date", f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{year - rng.randint(1, 8)}",
+        "Judgment Date", date,
+        "Conclusion(s)", "; ".join(conclusions),
+        "Article(s)", "\n".join(article_lines),
+        "Separate Opinion(s)", rng.choice(['Yes', 'No']),
+        "Domestic Law", "Section 1 of the Act",
+        "Strasbourg Case-Law", case_law,
+        "Keywords", "\n".join(f"({article}) {ARTICLE_NAMES.get(article, 'Just satisfaction')}" for article in articles),
+        "ECLI", f"ECLI:CE:ECHR:{year}:{date[3:5]}{date[:2]}JUD{ident[:8].replace('/', '')}"
+    ])
+
+    text = "\n".join([
+        title.replace('(1 of 1) ', ''),
+        f"(Application no(s). {ident})",
+        "JUDGMENT",
+        "STRASBOURG",
+        date,
+        f"In the case of {applicant.title()} v. {state},",
+        "The European Court of Human Rights, sitting as a Grand Chamber composed of:",
+        intro,
+        "Having deliberated in private,",
+        "Delivers the following judgment, which was adopted on that date:",
+        "PROCEDURE",
+        f"1.  The case originated in an application (no(s). {ident}) against the {state}.",
+        "THE FACTS",
+        make_paragraphs(rng, 2, max(1, paragraphs // 2)),
+        "THE LAW",
+        make_paragraphs(rng, 2 + max(1, paragraphs // 2), paragraphs),
+        "FOR THESE REASONS, THE COURT",
+        "\n".join(f"{i}.  Holds that there has been a {c.lower()};" for i, c in enumerate(conclusions[1:], 1)) or "1.  Dismisses the application."
+    ])
+    return Judgment(
+        title = title,
+        ident = ident,
+        text = text,
+        url = f"https://hudoc.echr.coe.int/eng#{{%22itemid%22:[%22001-{100000 + n}%22]}}",
+        case_details = case_details
+    )
+
+
+def make_corpus(Judgment, size, seed=42, paragraphs=20, unresolved_share=0.3):
+    """Generates a synthetic corpus in the format of the scraped data from Module 1.
+
+    About one in ten Judgements is registered under several joined application numbers.
+
+    Args:
+        Judgment (class): Judgment class of Module 2.
+        size (int): Number of Judgements.
+        seed (int): Seed of the random number generator.
+        paragraphs (int): Number of paragraphs in the law part of each text.
+        unresolved_share (float): Share of related cases which are not part of the corpus.
+
+    Returns:
+        Dictionary containing the synthetic Judgements, keyed like the scraped data.
+    """
+    rng = Random(seed)
+    numbers = set()
+    while len(numbers) < size:
+        numbers.add(make_application_number(rng))
+    idents = sorted(numbers)
+    corpus = {}
+    for n in range(size):
+        ident = ", ".join([idents[n]] + [make_application_number(rng) for _ in range(rng.randint(1, 3))]) if rng.random() < 0.1 else idents[n]
+        corpus[n + 1] = make_judgment(Judgment, rng, ident, idents, n, paragraphs, unresolved_share)
+    return corpus
+
+
+def time_stage(results, name, func, *args, **kwargs):
+    """Runs a single stage, stores its wall time in seconds in results and returns the output of the stage."""
+    with stage(name):
+        output = func(*args, **kwargs)
+    results[name] = REPORT['stages'][name]['wall_seconds']
+    return output
+
+
+def run_benchmark(size, stages, seed=42, paragraphs=20):
+    """Runs the pipeline stages on a synthetic corpus of the given size.
+
+    extract_data, clean_data, build_citation_table and build_network are always run since the later stages depend on their output, and so is extract_judges if create_sunburst_plot is selected.
+
+    Args:
+        size (int): Number of Judgements in the corpus.
+        stages (list): Names of the stages to time.
+        seed (int): Seed of the random number generator.
+        paragraphs (int): Number of paragraphs in the law part of each text.
+
+    Returns:
+        Dictionary containing the wall time of each stage in seconds.
+    """
+    import networkx as nx
+    import spacy
+
+    REPORT['stages'].clear()
+    REPORT['counters'].clear()
+    results = {}
+    module_2 = load_definitions(MODULE_2, nlp=spacy.load("en_core_web_sm"))
+    raw_data = time_stage(results, 'make_corpus', make_corpus, module_2['Judgment'], size, seed, paragraphs)
+
+    # Module 2
+    df = time_stage(results, 'extract_data', module_2['extract_data'], raw_data)
+    df = time_stage(results, 'clean_data', module_2['clean_data'], df)
+    if 'extract_judges' in stages or 'create_sunburst_plot' in stages: # the judge sunburst needs the judges
+        df['judges'] = time_stage(results, 'extract_judges', module_2['extract_judges'], df)
+    else:
+        df['judges'] = [[] for _ in range(len(df))]
+    if 'make_docs' in stages:
+        time_stage(results, 'make_docs', module_2['make_docs'], list(zip(df['the_law'], df['label'])))
+    citations = time_stage(results, 'build_citation_table', lambda: module_2['build_citation_table'](df, module_2['build_index'](df)))
+
+    # Module 3
+    module_3 = load_definitions(MODULE_3)
+    df['year'] = df['date'].dt.year
+    G = time_stage(results, 'build_network', module_3['build_network'], df, citations)
+    if 'spring_layout' in stages:
+        time_stage(results, 'spring_layout', nx.spring_layout, G)
+    if 'create_sunburst_plot' in stages:
+        time_stage(results, 'create_sunburst_plot', lambda: [
+            module_3['create_sunburst_plot'](df, 'articles', 'Number of Allegations by Country and Article'),
+            module_3['create_sunburst_plot'](df, 'judges', 'Number of Allegations by Country and Judge')
+        ])
+
+    # Module 4
+    if 'update_output' in stages:
+        module_4 = load_definitions(MODULE_4, nlp=spacy.load("output/model-best"))
+        time_stage(results, 'update_output', lambda: [module_4['update_output'](text) for text in df['the_law']])
+    return results
+
+
+def git_commit():
+    """Returns the current git commit, if available."""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_to_history(record, history):
+    """Prints the change of each stage against the last recorded run on the same corpus (size, paragraphs and seed)."""
+    previous = [r for r in history if r['size'] == record['size'] and r['paragraphs'] == record['paragraphs'] and r['seed'] == record['seed']]
+    if not previous:
+        return
+    last = previous[-1]
+    for name, seconds in record['stages'].items():
+        if last['stages'].get(name):
+            change = (seconds / last['stages'][name] - 1) * 100
+            print(f"{name}: {change:+.1f}% against {last['commit']} ({last['timestamp']})")
+
+
+def read_history(path=HISTORY):
+    """Reads all previous benchmark runs from the history file."""
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as handle:
+        return [json.loads(line) for line in handle if line.strip()]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline stages on a synthetic corpus.")
+    parser.add_argument('--sizes', nargs='+', type=int, default=[100, 1000], help="Corpus sizes to benchmark.")
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES, help="Stages to time, the stages the others depend on are always timed.")
+    parser.add_argument('--paragraphs', type=int, default=20, help="Number of paragraphs in the law part of each Judgement.")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--history', default=HISTORY, help="JSON lines file the results are appended to.")
+    args = parser.parse_args()
+
+    history = read_history(args.history)
+    for size in args.sizes:
+        print(f"Benchmarking corpus of {size} Judgements")
+        record = {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'size': size,
+            'paragraphs': args.paragraphs,
+            'seed': args.seed,
+            'stages': run_benchmark(size, args.stages, args.seed, args.paragraphs)
+        }
+        record['cpu'] = {name: result['cpu_seconds'] for name, result in REPORT['stages'].items()}
+        record['counters'] = dict(REPORT['counters'])
+        compare_to_history(record, history)
+        history.append(record)
+        with open(args.history, 'a', encoding='utf-8') as handle:
+            handle.write(json.dumps(record) + "\n")
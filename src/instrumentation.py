@@ -0,0 +1,149 @@
+import cProfile
+import json
+import os
+import sys
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from time import perf_counter, process_time
+
+# Lightweight instrumentation shared by all modules: throttled progress, per-stage timers, peak memory, counters and a JSON run report.
+# Peak memory per stage is traced with tracemalloc if TRACK_MEMORY=1, since tracing slows down allocation heavy code.
+# Stages listed in PROFILE_STAGES (comma separated, or "all") are profiled with cProfile, the stats are saved next to the report.
+
+REPORT_DIR = 'data/reports'
+TRACK_MEMORY = os.environ.get('TRACK_MEMORY') == '1'
+PROFILE_STAGES = set(filter(None, os.environ.get('PROFILE_STAGES', '').split(',')))
+
+REPORT = {'started': datetime.now().isoformat(timespec='seconds'), 'stages': {}, 'counters': {}}
+_active = [] # stack of running stages
+
+
+def count(name, n=1):
+    """Increments a counter, both for the whole run and for the running stage.
+
+    Args:
+        name (str): Name of the counter, e.g. 'ner_calls'.
+        n (int): Amount to increment the counter by.
+    """
+    REPORT['counters'][name] = REPORT['counters'].get(name, 0) + n
+    if _active:
+        counters = _active[-1]['counters']
+        counters[name] = counters.get(name, 0) + n
+
+
+def progress(iterable, label, total=None, interval=10):
+    """Wraps an iterable and reports the progress at most every interval seconds, and once it is finished.
+
+    Args:
+        iterable (iterable): Items to iterate over.
+        label (str): Label of the progress messages.
+        total (int): Number of items, taken from len(iterable) if not given.
+        interval (float): Minimum number of seconds between two progress messages.
+
+    Yields:
+        The items of the iterable.
+    """
+    if total is None and hasattr(iterable, '__len__'):
+        total = len(iterable)
+    of_total = f" of {total}" if total is not None else ""
+    start = last = perf_counter()
+    n = 0
+    for item in iterable:
+        yield item
+        n += 1
+        now = perf_counter()
+        if now - last >= interval:
+            print(f"{label}: {n}{of_total} ({n / (now - start):.1f}/s)")
+            last = now
+    elapsed = perf_counter() - start
+    print(f"{label}: {n}{of_total} done in {elapsed:.1f}s")
+
+
+def _children_cpu():
+    """Returns the CPU time of finished child processes in seconds, e.g. the workers of nlp.pipe(n_process=...), if the platform supports it."""
+    try:
+        import resource
+    except ImportError: # not available on Windows
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _peak_rss():
+    """Returns the peak resident memory of the process so far in bytes, if the platform supports it."""
+    try:
+        import resource
+    except ImportError: # not available on Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+@contextmanager
+def stage(name):
+    """Times a stage of the pipeline and records it in the run report.
+
+    Records the wall and CPU time, the growth of the peak resident memory, the traced peak memory (if TRACK_MEMORY=1) and the counters incremented during the stage. CPU time includes child processes where the platform reports them, otherwise only the main process is counted. Stages can be nested.
+
+    Args:
+        name (str): Name of the stage, e.g. 'clean_data'.
+    """
+    entry = {'counters': {}, 'child_peak': 0}
+    if TRACK_MEMORY:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if _active:
+            _active[-1]['child_peak'] = max(_active[-1]['child_peak'], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+    profiler = None
+    if (name in PROFILE_STAGES or 'all' in PROFILE_STAGES) and not any(s.get('profiler') for s in _active):
+        profiler = entry['profiler'] = cProfile.Profile()
+    _active.append(entry)
+    wall, cpu, children_cpu, rss = perf_counter(), process_time(), _children_cpu(), _peak_rss()
+    if profiler:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler:
+            profiler.disable()
+        result = {
+            'wall_seconds': round(perf_counter() - wall, 4),
+            'cpu_seconds': round(process_time() - cpu + (_children_cpu() - children_cpu if children_cpu is not None else 0), 4),
+            'cpu_includes_children': children_cpu is not None,
+            'peak_rss_growth_bytes': _peak_rss() - rss if rss is not None else None,
+            'counters': entry['counters']
+        }
+        _active.pop()
+        if TRACK_MEMORY:
+            result['peak_traced_bytes'] = max(entry['child_peak'], tracemalloc.get_traced_memory()[1])
+            if _active:
+                _active[-1]['child_peak'] = max(_active[-1]['child_peak'], result['peak_traced_bytes'])
+        if _active: # counters of nested stages also count towards the outer stage
+            for counter, n in entry['counters'].items():
+                _active[-1]['counters'][counter] = _active[-1]['counters'].get(counter, 0) + n
+        if profiler:
+            os.makedirs(REPORT_DIR, exist_ok=True)
+            result['profile'] = os.path.join(REPORT_DIR, f"{name}.prof")
+            profiler.dump_stats(result['profile'])
+        REPORT['stages'][name] = result
+        print(f"{name}: {result['wall_seconds']:.2f}s wall, {result['cpu_seconds']:.2f}s CPU")
+
+
+def write_report(name):
+    """Writes the run report as JSON to the report directory.
+
+    Args:
+        name (str): Name of the report file, without extension.
+
+    Returns:
+        The path of the report.
+    """
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    path = os.path.join(REPORT_DIR, f"{name}.json")
+    REPORT['finished'] = datetime.now().isoformat(timespec='seconds')
+    REPORT['peak_rss_bytes'] = _peak_rss()
+    with open(path, 'w', encoding='utf-8') as handle:
+        json.dump(REPORT, handle, indent=2)
+    return path